@@ -30,11 +30,14 @@ def hash_password(password: str) -> str:
 # This is determined by checking for the existence of the master key file.
 # - If the file exists, the user can proceed to login.
 # - If not, the user must complete first-time setup.
-def is_master_set() -> bool:
-    if not os.path.exists(MASTER_FILE):
+# Every function takes an optional master_file so each vault can have its
+# own master password; it defaults to the original MASTER_FILE.
+def is_master_set(master_file: str = None) -> bool:
+    master_file = master_file or MASTER_FILE
+    if not os.path.exists(master_file):
         return False
     try:
-        with open(MASTER_FILE, 'r', encoding='utf-8') as f:
+        with open(master_file, 'r', encoding='utf-8') as f:
             content = f.read().strip()
             return bool(content) and len(content) == 64
     except Exception:
@@ -43,19 +46,20 @@ def is_master_set() -> bool:
 # Saves a new master password securely.
 # Hashes the provided password and writes the resulting hash into the master key file.
 # This function is used only once during first-time setup.
-def set_master_password(password: str):
+def set_master_password(password: str, master_file: str = None):
     hashed = hash_password(password)
-    with open(MASTER_FILE, 'w') as f:
+    with open(master_file or MASTER_FILE, 'w') as f:
         f.write(hashed)
 
 # Verifies the user's input during login.
 # Hashes the entered password and compares it against the stored master password hash.
 # Returns True if the input is correct, otherwise returns False.
-def verify_master_password(input_password: str) -> bool:
-    if not is_master_set():
+def verify_master_password(input_password: str, master_file: str = None) -> bool:
+    master_file = master_file or MASTER_FILE
+    if not is_master_set(master_file):
         return False
     try:
-        with open(MASTER_FILE, 'r', encoding='utf-8') as f:
+        with open(master_file, 'r', encoding='utf-8') as f:
             stored_hash = f.read().strip()
         return hash_password(input_password) == stored_hash
     except Exception:
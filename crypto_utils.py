@@ -27,6 +27,7 @@ from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
+import hashlib
 import os
 import base64
 
@@ -39,6 +40,23 @@ ITERATIONS = 100_000  # PBKDF2 iterations to slow down brute-force attacks
 
 # --- Key Derivation ---
 
+# Keys derived while decrypting the unlocked vault, keyed by
+# (SHA-256 of the password, salt) so the plaintext password is not kept in it.
+# Set by vault_registry so switching back to a recently used vault
+# does not run PBKDF2 again for blobs it has already seen.
+# Only the decrypt path is cached: encryption always uses a fresh salt.
+_key_cache = None
+_key_cache_size = 0
+
+def use_key_cache(cache, max_size: int = 0):
+    """
+    Set the OrderedDict used as an LRU cache of derived keys, holding at
+    most max_size keys, or None to disable caching.
+    """
+    global _key_cache, _key_cache_size
+    _key_cache = cache
+    _key_cache_size = max_size
+
 def derive_key(password: str, salt: bytes) -> bytes:
     """
     Derive a secure AES encryption key from a master password and a salt.
@@ -59,6 +77,24 @@ def derive_key(password: str, salt: bytes) -> bytes:
     )
     return kdf.derive(password.encode())
 
+def _derive_key_cached(password: str, salt: bytes) -> bytes:
+    # derive_key() with the active vault's LRU cache in front of it
+    cache = _key_cache
+    if cache is None or _key_cache_size <= 0:
+        return derive_key(password, salt)
+
+    cache_key = (hashlib.sha256(password.encode()).digest(), salt)
+    key = cache.get(cache_key)
+    if key is not None:
+        cache.move_to_end(cache_key)
+        return key
+
+    key = derive_key(password, salt)
+    cache[cache_key] = key
+    while len(cache) > _key_cache_size:
+        cache.popitem(last=False)
+    return key
+
 # --- Encryption ---
 
 def encrypt_data(plaintext: str, password: str) -> str:
@@ -115,7 +151,7 @@ def decrypt_data(encrypted_data: str, password: str) -> str:
     ciphertext = encrypted_blob[SALT_SIZE + IV_SIZE:]
 
     # Derive encryption key again using extracted salt
-    key = derive_key(password, salt)
+    key = _derive_key_cached(password, salt)
 
     cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
     decryptor = cipher.decryptor()
@@ -1,7 +1,9 @@
+import os
+from tkinter import messagebox
 import customtkinter as ctk
-from auth import is_master_set
 from ui.login import FirstTimeSetupScreen, LoginScreen
-from vault import initialize_database
+from vault import initialize_database, migrate_legacy_vault
+from vault_registry import registry
 
 
 # Configure the global appearance (dark mode and blue theme)
@@ -10,16 +12,40 @@ ctk.set_default_color_theme("blue")
 
 # Initialize the main application window
 app = ctk.CTk()
-app.geometry("500x600")
+app.geometry("500x700")
 app.title("Local Password Manager")
 
+# Move a vault left in the old config folder before anything opens it
+migration_error = migrate_legacy_vault()
+if migration_error:
+    messagebox.showwarning("Vault Migration", f"{migration_error}\n\nThe old file was left in place; move it manually.")
+
 initialize_database()
 
 # Launch correct screen
-if is_master_set():
+if any(registry.is_master_set(name) for name in registry.list_vaults()):
     LoginScreen(app)
 else:
     FirstTimeSetupScreen(app)
 
+# Lock vaults that have not been used for a while (checked once a minute)
+def evict_idle_vaults():
+    registry.evict_idle()
+    app.after(60_000, evict_idle_vaults)
+
+app.after(60_000, evict_idle_vaults)
+
+# Optional event-loop stall watchdog (set PASSMANAGER_WATCHDOG=1 to enable)
+watchdog = None
+if os.environ.get("PASSMANAGER_WATCHDOG"):
+    from ui.watchdog import EventLoopWatchdog
+    watchdog = EventLoopWatchdog(app, threshold_ms=int(os.environ.get("PASSMANAGER_WATCHDOG_MS", "250")))
+    watchdog.start()
+
 # Start the main application event loop
 app.mainloop()
+
+registry.lock_all()
+
+if watchdog is not None:
+    print(f"Watchdog report written to {watchdog.stop()}")
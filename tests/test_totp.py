@@ -0,0 +1,73 @@
+import base64
+
+import pytest
+
+from totp import decode_secret, hotp, make_hmac_key, totp, totp_batch
+
+# RFC 6238 Appendix B: SHA-1 key is the ASCII string "12345678901234567890"
+RFC6238_SECRET = b"12345678901234567890"
+RFC6238_SECRET_B32 = base64.b32encode(RFC6238_SECRET).decode()
+
+RFC6238_VECTORS = [
+    (59, "94287082"),
+    (1111111109, "07081804"),
+    (1111111111, "14050471"),
+    (1234567890, "89005924"),
+    (2000000000, "69279037"),
+    (20000000000, "65353130"),
+]
+
+# RFC 4226 Appendix D: 6-digit HOTP values for counters 0-9 with the same key
+RFC4226_VECTORS = [
+    "755224", "287082", "359152", "969429", "338314",
+    "254676", "287922", "162583", "399871", "520489",
+]
+
+
+@pytest.mark.parametrize("for_time, expected", RFC6238_VECTORS)
+def test_totp_rfc6238_vectors(for_time, expected):
+    assert totp(make_hmac_key(RFC6238_SECRET), for_time, digits=8) == expected
+
+
+def test_totp_batch_rfc6238_vectors():
+    hmac_key = make_hmac_key(RFC6238_SECRET)
+    for for_time, expected in RFC6238_VECTORS:
+        codes = totp_batch({1: hmac_key, 2: make_hmac_key(RFC6238_SECRET)}, for_time, digits=8)
+        assert codes == {1: expected, 2: expected}
+
+
+@pytest.mark.parametrize("for_time, expected", RFC6238_VECTORS)
+def test_totp_six_digits(for_time, expected):
+    assert totp(make_hmac_key(RFC6238_SECRET), for_time) == expected[-6:]
+
+
+@pytest.mark.parametrize("counter, expected", list(enumerate(RFC4226_VECTORS)))
+def test_hotp_rfc4226_vectors(counter, expected):
+    assert hotp(make_hmac_key(RFC6238_SECRET), counter) == expected
+
+
+def test_cached_hmac_key_is_not_consumed():
+    hmac_key = make_hmac_key(RFC6238_SECRET)
+    assert totp(hmac_key, 59) == totp(hmac_key, 59) == "287082"
+
+
+@pytest.mark.parametrize("secret", [
+    RFC6238_SECRET_B32,
+    RFC6238_SECRET_B32.lower(),
+    " ".join(RFC6238_SECRET_B32[i:i + 4] for i in range(0, len(RFC6238_SECRET_B32), 4)),
+    "-".join(RFC6238_SECRET_B32[i:i + 4] for i in range(0, len(RFC6238_SECRET_B32), 4)),
+])
+def test_decode_secret_accepts_common_formats(secret):
+    assert decode_secret(secret) == RFC6238_SECRET
+
+
+def test_decode_secret_adds_missing_padding():
+    # "JBSWY3DPEE" is base32 for b"Hello!" without its "======" padding
+    assert decode_secret("JBSWY3DPEE") == b"Hello!"
+    assert decode_secret("jbswy3dpee") == b"Hello!"
+
+
+@pytest.mark.parametrize("secret", ["", "   ", "NOT-BASE32!", "12345678", "A"])
+def test_decode_secret_rejects_invalid(secret):
+    with pytest.raises(ValueError):
+        decode_secret(secret)
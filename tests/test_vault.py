@@ -0,0 +1,75 @@
+import pytest
+
+pytest.importorskip("cryptography")
+pytest.importorskip("platformdirs")
+
+import vault
+
+
+@pytest.fixture
+def vault_db(tmp_path):
+    vault.use_vault(str(tmp_path / "vault.db"))
+    vault.initialize_database()
+    yield
+    vault.use_vault(str(tmp_path / "unused.db"))
+
+
+def _only_entry(master_password="master"):
+    entries = vault.get_group_entries("example.com", master_password)
+    assert len(entries) == 1
+    return entries[0]
+
+
+def test_update_keeps_unpassed_fields(vault_db):
+    vault.add_password("example.com", "alice", "s3cret-pass", "", "master",
+                       totp_secret="JBSWY3DPEHPK3PXP", folder="Work", tags="mail, personal")
+    entry_id = _only_entry()["id"]
+
+    vault.update_password(entry_id, "example.com", "alice", "s3cret-pass", "note", "master",
+                          old_plain_password="s3cret-pass")
+
+    entry = _only_entry()
+    assert entry["totp_secret"] == "JBSWY3DPEHPK3PXP"
+    assert entry["folder"] == "Work"
+    assert entry["tags"] == ["mail", "personal"]
+
+
+def test_update_clears_fields_passed_empty(vault_db):
+    vault.add_password("example.com", "alice", "s3cret-pass", "", "master",
+                       totp_secret="JBSWY3DPEHPK3PXP", folder="Work", tags="mail")
+    entry_id = _only_entry()["id"]
+
+    vault.update_password(entry_id, "example.com", "alice", "s3cret-pass", "", "master",
+                          new_totp_secret="", new_folder="", new_tags="", old_plain_password="s3cret-pass")
+
+    entry = _only_entry()
+    assert (entry["totp_secret"], entry["folder"], entry["tags"]) == ("", "", [])
+
+
+def test_history_records_changed_passwords_only(vault_db):
+    vault.add_password("example.com", "alice", "first-pass", "", "master")
+    entry_id = _only_entry()["id"]
+
+    vault.update_password(entry_id, "example.com", "alice", "first-pass", "notes", "master",
+                          old_plain_password="first-pass")
+    assert vault.get_password_history(entry_id) == []
+
+    vault.update_password(entry_id, "example.com", "alice", "second-pass", "notes", "master",
+                          old_plain_password="first-pass")
+    history = vault.get_password_history(entry_id)
+    assert len(history) == 1
+    assert vault.decrypt_history_version(history[0]["id"], "master") == "first-pass"
+
+
+def test_prune_history_none_disables_limit(vault_db):
+    vault.add_password("example.com", "alice", "pass-0", "", "master")
+    entry_id = _only_entry()["id"]
+    for version in range(1, 5):
+        vault.update_password(entry_id, "example.com", "alice", f"pass-{version}", "", "master",
+                              old_plain_password=f"pass-{version - 1}")
+
+    vault.prune_history(max_versions=None, max_age_days=None)
+    assert len(vault.get_password_history(entry_id)) == 4
+
+    vault.prune_history(max_versions=2, max_age_days=None)
+    assert len(vault.get_password_history(entry_id)) == 2
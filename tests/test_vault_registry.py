@@ -0,0 +1,183 @@
+import hashlib
+import shutil
+
+import pytest
+
+pytest.importorskip("cryptography")
+pytest.importorskip("platformdirs")
+
+import crypto_utils
+import vault
+import vault_registry
+from vault_registry import DEFAULT_VAULT, VaultRegistry
+
+
+@pytest.fixture
+def derive_calls(monkeypatch):
+    # Fast stand-in for PBKDF2 that counts how often a key is derived
+    calls = []
+
+    def fake_derive_key(password, salt):
+        calls.append(salt)
+        return hashlib.sha256(password.encode() + salt).digest()
+
+    monkeypatch.setattr(crypto_utils, "derive_key", fake_derive_key)
+    return calls
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch, derive_calls):
+    monkeypatch.setattr(vault_registry, "CONFIG_DIR", str(tmp_path))
+    monkeypatch.setattr(vault_registry, "VAULTS_DIR", str(tmp_path / "vaults"))
+    monkeypatch.setattr(vault_registry, "MASTER_FILE", str(tmp_path / "master.key"))
+    # The registry repoints these module globals; restore them afterwards
+    monkeypatch.setattr(vault, "VAULT_DB", vault.VAULT_DB)
+    monkeypatch.setattr(vault, "_active_conn", None)
+    monkeypatch.setattr(crypto_utils, "_key_cache", None)
+    monkeypatch.setattr(crypto_utils, "_key_cache_size", 0)
+
+    registry = VaultRegistry(max_open=2)
+    for name in ("a", "b", "c"):
+        registry.create_vault(name, f"{name}-master")
+    yield registry
+    registry.lock_all()
+
+
+def _unlock(registry, name):
+    session = registry.unlock(name, f"{name}-master")
+    assert session is not None
+    return session
+
+
+def test_wrong_password_does_not_unlock(registry):
+    assert registry.unlock("a", "wrong") is None
+    _unlock(registry, "a")
+    assert registry.unlock("a", "wrong") is None
+
+
+def test_eviction_keeps_active_and_just_unlocked_vault(registry):
+    _unlock(registry, "a")
+    registry.activate("a")
+    _unlock(registry, "b")
+    _unlock(registry, "c")
+
+    # "a" is the oldest entry but active, "c" was just unlocked
+    assert set(registry._sessions) == {"a", "c"}
+    assert registry.active_name == "a"
+
+
+def test_eviction_never_goes_below_active_and_just_unlocked(registry):
+    registry.max_open = 1
+    _unlock(registry, "a")
+    registry.activate("a")
+    _unlock(registry, "b")
+
+    assert set(registry._sessions) == {"a", "b"}
+
+
+def test_evict_idle_locks_only_inactive_vaults(registry):
+    registry.idle_timeout = 60
+    _unlock(registry, "a")
+    registry.activate("a")
+    _unlock(registry, "b")
+    for session in registry._sessions.values():
+        session.last_used -= 120
+
+    registry.evict_idle()
+
+    assert list(registry._sessions) == ["a"]
+
+
+def test_locking_active_vault_repoints_modules(registry):
+    session = _unlock(registry, "a")
+    registry.activate("a")
+    assert vault._active_conn is session.conn
+    assert crypto_utils._key_cache is session.key_cache
+
+    registry.lock("a")
+
+    assert registry.active_name is None
+    assert vault.VAULT_DB == registry.paths(DEFAULT_VAULT)[0]
+    assert vault._active_conn is None
+    assert crypto_utils._key_cache is None
+    assert session.master_password is None
+
+
+def test_key_cache_is_bounded(registry, derive_calls, monkeypatch):
+    monkeypatch.setattr(vault_registry, "KEY_CACHE_SIZE", 2)
+    session = _unlock(registry, "a")
+    registry.activate("a")
+    blobs = [crypto_utils.encrypt_data(f"secret-{i}", "a-master") for i in range(3)]
+
+    for blob in blobs:
+        crypto_utils.decrypt_data(blob, "a-master")
+    assert len(session.key_cache) == 2
+
+    # The newest key is still cached, the oldest was evicted
+    derive_calls.clear()
+    assert crypto_utils.decrypt_data(blobs[2], "a-master") == "secret-2"
+    assert derive_calls == []
+    assert crypto_utils.decrypt_data(blobs[0], "a-master") == "secret-0"
+    assert len(derive_calls) == 1
+    assert len(session.key_cache) == 2
+
+
+def test_switching_back_to_cached_vault_derives_no_keys(registry, derive_calls):
+    _unlock(registry, "a")
+    registry.activate("a")
+    vault.add_password("example.com", "alice", "s3cret-pass", "", "a-master")
+    assert vault.get_group_entries("example.com", "a-master")[0]["password"] == "s3cret-pass"
+
+    _unlock(registry, "b")
+    registry.activate("b")
+    assert vault.get_group_entries("example.com", "b-master") == []
+
+    derive_calls.clear()
+    registry.activate("a")
+    assert vault.get_group_entries("example.com", "a-master")[0]["password"] == "s3cret-pass"
+    assert derive_calls == []
+
+
+@pytest.fixture
+def legacy_paths(tmp_path, monkeypatch):
+    new_db = tmp_path / "config" / "vault.db"
+    legacy_db = tmp_path / "legacy" / "vault.db"
+    new_db.parent.mkdir()
+    legacy_db.parent.mkdir()
+    legacy_db.write_bytes(b"legacy vault")
+    monkeypatch.setattr(vault, "VAULT_DB", str(new_db))
+    monkeypatch.setattr(vault, "LEGACY_VAULT_DB", str(legacy_db))
+    return new_db, legacy_db
+
+
+def test_migrate_legacy_vault_moves_file(legacy_paths):
+    new_db, legacy_db = legacy_paths
+
+    assert vault.migrate_legacy_vault() is None
+    assert new_db.read_bytes() == b"legacy vault"
+    assert not legacy_db.exists()
+
+
+def test_migrate_legacy_vault_same_path_is_noop(legacy_paths, monkeypatch):
+    _new_db, legacy_db = legacy_paths
+    monkeypatch.setattr(vault, "VAULT_DB", str(legacy_db))
+
+    assert vault.migrate_legacy_vault() is None
+    assert legacy_db.read_bytes() == b"legacy vault"
+
+
+def test_migrate_legacy_vault_removes_partial_copy(legacy_paths, monkeypatch):
+    new_db, legacy_db = legacy_paths
+
+    def failing_move(src, dst):
+        # Like a move across drives that fails after copying
+        shutil.copyfile(src, dst)
+        raise OSError("disk full")
+
+    monkeypatch.setattr(vault.shutil, "move", failing_move)
+
+    message = vault.migrate_legacy_vault()
+
+    assert "disk full" in message
+    assert not new_db.exists()
+    assert legacy_db.read_bytes() == b"legacy vault"
@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+import time
+
+from ui import watchdog
+from ui.watchdog import PROJECT_DIR, EventLoopWatchdog, _is_project_frame
+
+
+def test_app_modules_are_project_frames():
+    assert _is_project_frame(os.path.join(PROJECT_DIR, "ui", "login.py"))
+    assert _is_project_frame(os.path.join(PROJECT_DIR, "vault.py"))
+
+
+def test_watchdog_itself_is_not_a_project_frame():
+    assert not _is_project_frame(watchdog.__file__)
+
+
+def test_virtualenv_inside_project_is_not_a_project_frame():
+    for venv in (".venv", "venv"):
+        library_file = os.path.join(
+            PROJECT_DIR, venv, "lib", "python3.12", "site-packages", "customtkinter", "windows", "widgets", "ctk_button.py"
+        )
+        assert not _is_project_frame(library_file)
+
+
+def test_files_outside_project_are_not_project_frames():
+    assert not _is_project_frame(os.path.join(os.path.dirname(PROJECT_DIR), "elsewhere", "tkinter.py"))
+    assert not _is_project_frame("<frozen runpy>")
+
+
+# A minimal stand-in for the Tk after() loop. It is compiled under a
+# pseudo-filename so, like Tk's real dispatcher, it is not project code and
+# the first project frame on the stack is the callback being run.
+FAKE_TK_SOURCE = """
+import time
+
+class FakeTkApp:
+    def __init__(self):
+        self._queue = []
+        self._next_id = 0
+
+    def after(self, ms, callback):
+        self._next_id += 1
+        self._queue.append((time.perf_counter() + ms / 1000, self._next_id, callback))
+        return self._next_id
+
+    def after_cancel(self, after_id):
+        self._queue = [item for item in self._queue if item[1] != after_id]
+
+    def run_for(self, seconds):
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            self._queue.sort(key=lambda item: item[0])
+            if self._queue and self._queue[0][0] <= time.perf_counter():
+                _due, _after_id, callback = self._queue.pop(0)
+                callback()
+            else:
+                time.sleep(0.002)
+
+def drive(app, monitor, seconds):
+    monitor.start()
+    app.run_for(seconds)
+    monitor._stop_event.set()
+"""
+
+fake_tk = {}
+exec(compile(FAKE_TK_SOURCE, "<fake tk>", "exec"), fake_tk)
+
+
+class SlowScreen:
+    def __init__(self):
+        self.refresh_entries()
+
+    def refresh_entries(self):
+        time.sleep(0.7)
+
+
+class QuickScreen:
+    def __init__(self):
+        time.sleep(0.7)
+
+
+def _run_with_stalls(*callbacks):
+    # The loop runs on its own thread so the test function is not on its stack
+    app = fake_tk["FakeTkApp"]()
+    monitor = EventLoopWatchdog(app, interval_ms=20, threshold_ms=250)
+    for index, callback in enumerate(callbacks):
+        app.after(50 + index * 1000, callback)
+    loop = threading.Thread(target=fake_tk["drive"], args=(app, monitor, 0.3 + len(callbacks) * 1.0))
+    loop.start()
+    loop.join()
+    return monitor
+
+
+def test_stall_is_detected_and_attributed(tmp_path):
+    monitor = _run_with_stalls(SlowScreen)
+
+    summary = monitor.summary()
+    assert summary["stall_count"] == 1
+    assert list(summary["by_callback"]) == ["SlowScreen.__init__ > SlowScreen.refresh_entries"]
+    assert summary["worst_stalls"][0]["hotspot"].endswith("SlowScreen.refresh_entries")
+
+    # 700 ms blocked minus at most one 20 ms heartbeat interval
+    assert summary["stall_histogram"]["< 1000 ms"] == 1
+    assert sum(summary["stall_histogram"].values()) == 1
+
+    text_path = monitor.write_report(report_dir=tmp_path)
+    assert text_path == str(tmp_path / "watchdog_report.txt")
+    assert "SlowScreen.__init__ > SlowScreen.refresh_entries" in (tmp_path / "watchdog_report.txt").read_text()
+    report = json.loads((tmp_path / "watchdog_report.json").read_text())
+    assert report["stall_count"] == 1
+
+
+def test_constructors_of_different_screens_are_reported_separately():
+    monitor = _run_with_stalls(SlowScreen, QuickScreen)
+
+    by_callback = monitor.summary()["by_callback"]
+    assert set(by_callback) == {"SlowScreen.__init__ > SlowScreen.refresh_entries", "QuickScreen.__init__"}
+    assert all(stats["count"] == 1 for stats in by_callback.values())
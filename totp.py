@@ -0,0 +1,122 @@
+# totp.py
+# -------------------------------------------------------
+# This module computes time-based one-time passwords (TOTP)
+# for vault entries that carry a 2FA secret.
+#
+# WHY THIS FILE EXISTS:
+# Many sites ask for a 6-digit code from an authenticator app.
+# Storing the TOTP secret next to the password lets the dashboard
+# show the current code without a separate app.
+#
+# DESIGN DECISIONS:
+# - Follows RFC 6238 (TOTP) on top of RFC 4226 (HOTP) using HMAC-SHA1,
+#   a 30-second period and 6 digits, the defaults every site uses.
+# - Secrets are entered as base32 text, the format shown under QR codes.
+# - make_hmac_key() returns a keyed HMAC object. Callers cache it per entry
+#   and totp_batch() copies it for each code, so the key is only set up once.
+# - totp_batch() computes the time step once for a whole batch of entries.
+#
+# HOW THIS MODULE FITS THE FULL APPLICATION:
+# - The secret is encrypted with crypto_utils before it is saved in vault.py.
+# - The dashboard keeps one refresh scheduler (ui/totp_scheduler.py) that
+#   calls totp_batch() for the visible rows once per period.
+# -------------------------------------------------------
+
+import base64
+import binascii
+import hashlib
+import hmac
+import struct
+import time
+
+# --- Constants ---
+
+PERIOD = 30  # Seconds each code stays valid
+DIGITS = 6   # Number of digits in a code
+
+# --- Secrets ---
+
+def decode_secret(secret: str) -> bytes:
+    """
+    Decode a base32 TOTP secret as shown by websites.
+
+    Spaces, dashes and lowercase letters are accepted and missing
+    padding is added back.
+
+    Args:
+        secret (str): The base32-encoded secret.
+
+    Returns:
+        bytes: The raw HMAC key.
+
+    Raises:
+        ValueError: If the secret is empty or not valid base32.
+    """
+    cleaned = secret.replace(" ", "").replace("-", "").upper()
+    if not cleaned:
+        raise ValueError("TOTP secret is empty.")
+    cleaned += "=" * (-len(cleaned) % 8)
+    try:
+        return base64.b32decode(cleaned)
+    except binascii.Error as exc:
+        raise ValueError("TOTP secret is not valid base32.") from exc
+
+def make_hmac_key(key: bytes):
+    """
+    Create a keyed HMAC-SHA1 object for a raw TOTP key.
+
+    The object is copied for each code, so cache it for the session.
+    """
+    return hmac.new(key, digestmod=hashlib.sha1)
+
+# --- Code Generation ---
+
+def time_step(for_time: float = None, period: int = PERIOD) -> int:
+    """
+    Return the RFC 6238 time step (counter) for a moment in time.
+    """
+    if for_time is None:
+        for_time = time.time()
+    return int(for_time // period)
+
+def seconds_remaining(for_time: float = None, period: int = PERIOD) -> float:
+    """
+    Return how many seconds are left before the current code changes.
+    """
+    if for_time is None:
+        for_time = time.time()
+    return period - (for_time % period)
+
+def hotp(hmac_key, counter: int, digits: int = DIGITS) -> str:
+    """
+    Compute an RFC 4226 HOTP code from a keyed HMAC object and a counter.
+    """
+    mac = hmac_key.copy()
+    mac.update(struct.pack(">Q", counter))
+    digest = mac.digest()
+
+    # Dynamic truncation
+    offset = digest[-1] & 0x0F
+    code = struct.unpack(">I", digest[offset:offset + 4])[0] & 0x7FFFFFFF
+
+    return str(code % (10 ** digits)).zfill(digits)
+
+def totp(hmac_key, for_time: float = None, digits: int = DIGITS, period: int = PERIOD) -> str:
+    """
+    Compute the TOTP code for a single keyed HMAC object.
+    """
+    return hotp(hmac_key, time_step(for_time, period), digits)
+
+def totp_batch(hmac_keys: dict, for_time: float = None, digits: int = DIGITS, period: int = PERIOD) -> dict:
+    """
+    Compute TOTP codes for many entries at the same moment.
+
+    Args:
+        hmac_keys (dict): Mapping of entry id to keyed HMAC object.
+        for_time (float): Unix time to compute codes for (default: now).
+
+    Returns:
+        dict: Mapping of entry id to code string.
+    """
+    counter = time_step(for_time, period)
+    return {entry_id: hotp(hmac_key, counter, digits) for entry_id, hmac_key in hmac_keys.items()}
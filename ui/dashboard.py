@@ -1,14 +1,21 @@
+import time
 import customtkinter as ctk
-from vault import get_all_passwords
+from vault import get_groups, get_group_entries, get_folders, get_tags
+from ui.totp_scheduler import TotpScheduler
+from vault_registry import DEFAULT_VAULT, registry
+
+ALL_FOLDERS = "All folders"
+ALL_TAGS = "All tags"
 
 class DashboardScreen:
     """
     GUI screen for the main password vault dashboard after successful login.
     """
 
-    def __init__(self, app, master_password):
+    def __init__(self, app, master_password, vault_name=DEFAULT_VAULT):
         self.app = app
         self.master_password = master_password
+        self.vault_name = vault_name
 
         # Clear existing widgets
         for widget in self.app.winfo_children():
@@ -16,14 +23,37 @@ class DashboardScreen:
 
         # Welcome label
         self.title_label = ctk.CTkLabel(self.app, text="Welcome to Your Password Vault", font=("Arial", 20))
-        self.title_label.pack(pady=30)
-
-        # Load all vault entries
-        self.entries = get_all_passwords(self.master_password)
+        self.title_label.pack(pady=(30, 10))
+
+        # Vault switcher (only lists vault names; nothing is opened until chosen)
+        vault_names = [name for name in registry.list_vaults() if registry.is_master_set(name)]
+        self.vault_menu = ctk.CTkOptionMenu(self.app, values=vault_names or [vault_name], command=self.switch_vault)
+        self.vault_menu.set(vault_name)
+        self.vault_menu.pack(pady=(0, 10))
+
+        # Entries are loaded per group when it is expanded (entry id -> entry)
+        self.entries = {}
+        self.expanded_groups = set()
+        self.group_containers = {}
+
+        # Folder / tag filters
+        self.folder_filter = None
+        self.tag_filter = None
+        filter_frame = ctk.CTkFrame(self.app, fg_color="transparent")
+        filter_frame.pack()
+        self.folder_menu = ctk.CTkOptionMenu(filter_frame, values=[ALL_FOLDERS], command=self.on_folder_filter)
+        self.folder_menu.pack(side="left", padx=5)
+        self.tag_menu = ctk.CTkOptionMenu(filter_frame, values=[ALL_TAGS], command=self.on_tag_filter)
+        self.tag_menu.pack(side="left", padx=5)
 
         # Scrollable frame to list vault entries
         self.entries_frame = ctk.CTkScrollableFrame(self.app, width=500, height=350)
         self.entries_frame.pack(pady=10)
+
+        # One shared timer refreshes every visible TOTP code
+        self.totp_scheduler = TotpScheduler(self.app, self.entries_frame)
+        self.totp_scheduler.start()
+
         # Add Password button
         self.add_password_button = ctk.CTkButton(self.app, text="Add Password", command=self.open_add_password_popup)
         self.add_password_button.pack(pady=15)
@@ -37,7 +67,27 @@ class DashboardScreen:
     
     def logout(self):
         from ui.login import LoginScreen
-        LoginScreen(self.app)
+        self.totp_scheduler.stop()
+        # Logging out forgets every unlocked vault, not just this one
+        registry.lock_all()
+        LoginScreen(self.app, vault_name=self.vault_name)
+
+    def switch_vault(self, name):
+        """
+        Switch to another vault. A recently used vault is still unlocked in
+        the registry and opens directly; otherwise ask for its master password.
+        """
+        if name == self.vault_name:
+            return
+        self.totp_scheduler.stop()
+
+        session = registry.get_session(name)
+        if session is not None:
+            registry.activate(name)
+            DashboardScreen(self.app, session.master_password, vault_name=name)
+        else:
+            from ui.login import LoginScreen
+            LoginScreen(self.app, vault_name=name)
     
     def open_add_password_popup(self):
         """
@@ -46,7 +96,7 @@ class DashboardScreen:
         #print("Add Password button clicked.")
         popup = ctk.CTkToplevel(self.app)
         popup.title("Add New Password")
-        popup.geometry("400x650")
+        popup.geometry("400x830")
         popup.after(100, popup.grab_set)
 
         # Website field
@@ -98,6 +148,22 @@ class DashboardScreen:
         notes_entry = ctk.CTkEntry(popup)
         notes_entry.pack(pady=5)
 
+        # TOTP secret field
+        totp_label = ctk.CTkLabel(popup, text="2FA Secret (optional):")
+        totp_label.pack(pady=(20,5))
+        totp_entry = ctk.CTkEntry(popup)
+        totp_entry.pack(pady=5)
+
+        # Folder and tags fields
+        grouping_label = ctk.CTkLabel(popup, text="Folder / Tags (optional):")
+        grouping_label.pack(pady=(20,5))
+        grouping_frame = ctk.CTkFrame(popup, fg_color="transparent")
+        grouping_frame.pack(pady=5)
+        folder_entry = ctk.CTkEntry(grouping_frame, width=120, placeholder_text="Folder")
+        folder_entry.pack(side="left", padx=5)
+        tags_entry = ctk.CTkEntry(grouping_frame, width=160, placeholder_text="tag1, tag2")
+        tags_entry.pack(side="left", padx=5)
+
 
         def save_password():
             """
@@ -107,10 +173,19 @@ class DashboardScreen:
             username = username_entry.get()
             password = password_entry.get()
             notes = notes_entry.get()
+            totp_secret = totp_entry.get().strip()
 
             if not website or not username or not password:
                 status_label.configure(text="Website, Username and Password are required.", text_color="red")
                 return
+
+            if totp_secret:
+                from totp import decode_secret
+                try:
+                    decode_secret(totp_secret)
+                except ValueError:
+                    status_label.configure(text="2FA secret is not valid base32.", text_color="red")
+                    return
             
             from vault import add_password, entry_exists
 
@@ -129,7 +204,10 @@ class DashboardScreen:
                 username=username,
                 plain_password=password,
                 notes=notes,
-                master_password=self.master_password
+                master_password=self.master_password,
+                totp_secret=totp_secret,
+                folder=folder_entry.get(),
+                tags=tags_entry.get()
             )
 
             # Show success message
@@ -157,41 +235,120 @@ class DashboardScreen:
         Open a popup window to edit an existing password entry.
         """
         # Find the entry by ID
-        entry_to_edit = next((e for e in self.entries if e['id'] == entry_id), None)
+        entry_to_edit = self.entries.get(entry_id)
         if not entry_to_edit:
             print(f"Error: Entry with ID {entry_id} not found.")
             return
         
         popup = ctk.CTkToplevel(self.app)
         popup.title("Edit Password")
-        popup.geometry("400x650")
+        popup.geometry("400x700")
         popup.after(100, popup.grab_set)
 
+        # Scrollable body so the history section fits on small screens
+        body = ctk.CTkScrollableFrame(popup, fg_color="transparent")
+        body.pack(fill="both", expand=True)
+
         # Pre-fill fields
-        website_label = ctk.CTkLabel(popup, text="Website:")
+        website_label = ctk.CTkLabel(body, text="Website:")
         website_label.pack(pady=(20, 5))
-        website_entry = ctk.CTkEntry(popup)
+        website_entry = ctk.CTkEntry(body)
         website_entry.insert(0, entry_to_edit['website'])
         website_entry.pack(pady=5)
 
-        username_label = ctk.CTkLabel(popup, text="Username:")
+        username_label = ctk.CTkLabel(body, text="Username:")
         username_label.pack(pady=(20, 5))
-        username_entry = ctk.CTkEntry(popup)
+        username_entry = ctk.CTkEntry(body)
         username_entry.insert(0, entry_to_edit['username'])
         username_entry.pack(pady=5)
 
-        password_label = ctk.CTkLabel(popup, text="Password:")
+        password_label = ctk.CTkLabel(body, text="Password:")
         password_label.pack(pady=(20, 5))
-        password_entry = ctk.CTkEntry(popup)
+        password_entry = ctk.CTkEntry(body)
         password_entry.insert(0, entry_to_edit['password'])
         password_entry.pack(pady=5)
 
-        notes_label = ctk.CTkLabel(popup, text="Notes (optional):")
+        notes_label = ctk.CTkLabel(body, text="Notes (optional):")
         notes_label.pack(pady=(20, 5))
-        notes_entry = ctk.CTkEntry(popup)
+        notes_entry = ctk.CTkEntry(body)
         notes_entry.insert(0, entry_to_edit['notes'])
         notes_entry.pack(pady=5)
 
+        totp_label = ctk.CTkLabel(body, text="2FA Secret (optional):")
+        totp_label.pack(pady=(20, 5))
+        totp_entry = ctk.CTkEntry(body)
+        totp_entry.insert(0, entry_to_edit['totp_secret'])
+        totp_entry.pack(pady=5)
+
+        grouping_label = ctk.CTkLabel(body, text="Folder / Tags (optional):")
+        grouping_label.pack(pady=(20, 5))
+        grouping_frame = ctk.CTkFrame(body, fg_color="transparent")
+        grouping_frame.pack(pady=5)
+        folder_entry = ctk.CTkEntry(grouping_frame, width=120, placeholder_text="Folder")
+        if entry_to_edit['folder']:
+            folder_entry.insert(0, entry_to_edit['folder'])
+        folder_entry.pack(side="left", padx=5)
+        tags_entry = ctk.CTkEntry(grouping_frame, width=160, placeholder_text="tag1, tag2")
+        if entry_to_edit['tags']:
+            tags_entry.insert(0, ", ".join(entry_to_edit['tags']))
+        tags_entry.pack(side="left", padx=5)
+
+        # Password history: list versions by date, decrypt only the one picked
+        from vault import get_password_history
+        history = get_password_history(entry_id)
+
+        history_label = ctk.CTkLabel(body, text="Previous Passwords:")
+        history_label.pack(pady=(20, 5))
+
+        if history:
+            # Number the versions so two edits in the same minute stay distinct
+            history_choices = {
+                f"{number}. {time.strftime('%Y-%m-%d %H:%M', time.localtime(version['changed_at']))}": version['id']
+                for number, version in enumerate(history, start=1)
+            }
+            history_menu = ctk.CTkOptionMenu(body, values=list(history_choices))
+            history_menu.pack(pady=5)
+
+            history_value_label = ctk.CTkLabel(body, text="", wraplength=300)
+            history_value_label.pack(pady=2)
+
+            selected_version = [None]
+
+            def show_version():
+                from vault import decrypt_history_version
+
+                old_password = decrypt_history_version(history_choices[history_menu.get()], self.master_password)
+                if old_password is None:
+                    history_value_label.configure(text="This version is no longer available.", text_color="orange")
+                    return
+                selected_version[0] = old_password
+                history_value_label.configure(text=old_password, text_color="gray")
+                restore_btn.configure(state="normal")
+
+            def restore_version():
+                password_entry.delete(0, 'end')
+                password_entry.insert(0, selected_version[0])
+
+            history_actions = ctk.CTkFrame(body, fg_color="transparent")
+            history_actions.pack(pady=5)
+
+            show_btn = ctk.CTkButton(history_actions, text="Show", width=80, command=show_version)
+            show_btn.pack(side="left", padx=5)
+
+            restore_btn = ctk.CTkButton(history_actions, text="Restore", width=80, state="disabled", command=restore_version)
+            restore_btn.pack(side="left", padx=5)
+
+            # Hide the previously shown password when another version is picked
+            def on_version_change(_choice):
+                selected_version[0] = None
+                history_value_label.configure(text="")
+                restore_btn.configure(state="disabled")
+
+            history_menu.configure(command=on_version_change)
+        else:
+            no_history_label = ctk.CTkLabel(body, text="No previous passwords.", text_color="gray")
+            no_history_label.pack(pady=5)
+
         # Save Changes button
         def save_changes():
             from vault import update_password
@@ -200,6 +357,15 @@ class DashboardScreen:
             new_username = username_entry.get()
             new_password = password_entry.get()
             new_notes = notes_entry.get()
+            new_totp_secret = totp_entry.get().strip()
+
+            if new_totp_secret:
+                from totp import decode_secret
+                try:
+                    decode_secret(new_totp_secret)
+                except ValueError:
+                    edit_status_label.configure(text="2FA secret is not valid base32.", text_color="red")
+                    return
 
             update_password(
                 entry_id=entry_id,
@@ -207,24 +373,35 @@ class DashboardScreen:
                 new_username=new_username,
                 new_plain_password=new_password,
                 new_notes=new_notes,
-                master_password=self.master_password
+                master_password=self.master_password,
+                new_totp_secret=new_totp_secret,
+                new_folder=folder_entry.get(),
+                new_tags=tags_entry.get(),
+                old_plain_password=entry_to_edit['password']
             )
 
             self.refresh_entries()
 
             popup.destroy()
 
-        save_button = ctk.CTkButton(popup, text="Save Changes", command=save_changes)
+        # Status label
+        edit_status_label = ctk.CTkLabel(body, text="", text_color="gray", wraplength=300, justify="center")
+        edit_status_label.pack(pady=(10, 0))
+
+        save_button = ctk.CTkButton(body, text="Save Changes", command=save_changes)
         save_button.pack(pady=20)
         
-    def create_entry_frame(self, entry):
+    def create_entry_frame(self, entry, parent=None):
         """
         Create a single entry block in the UI from a vauilt record.
         """
-        entry_frame = ctk.CTkFrame(self.entries_frame)
+        if parent is None:
+            parent = self.entries_frame
+
+        entry_frame = ctk.CTkFrame(parent)
         entry_frame.pack(pady=5, padx=10, fill="x")
         
-        separator = ctk.CTkLabel(self.entries_frame, text="─" * 100, text_color="gray")
+        separator = ctk.CTkLabel(parent, text="─" * 100, text_color="gray")
         separator.pack(pady=2)
 
         website_label = ctk.CTkLabel(entry_frame, text=f"Website: {entry['website']}")
@@ -233,6 +410,11 @@ class DashboardScreen:
         username_label = ctk.CTkLabel(entry_frame, text=f"Username: {entry['username']}")
         username_label.pack(anchor="w", padx=10)
 
+        if entry['folder'] or entry['tags']:
+            grouping_text = f"Folder: {entry['folder'] or '-'}   Tags: {', '.join(entry['tags']) or '-'}"
+            grouping_label = ctk.CTkLabel(entry_frame, text=grouping_text, text_color="gray")
+            grouping_label.pack(anchor="w", padx=10)
+
         # Frame to hold password and reveal button
         password_frame = ctk.CTkFrame(entry_frame)
         password_frame.pack(fill="x", padx=10, pady=5)
@@ -280,6 +462,32 @@ class DashboardScreen:
 
         copy_btn.configure(command=copy_to_clipboard)
 
+        # TOTP code row; the shared scheduler fills in the code
+        if entry['totp_secret']:
+            totp_frame = ctk.CTkFrame(entry_frame)
+            totp_frame.pack(fill="x", padx=10, pady=5)
+
+            code_label = ctk.CTkLabel(totp_frame, text="2FA Code: --- ---")
+            code_label.pack(side="left", padx=(0, 10))
+
+            try:
+                self.totp_scheduler.register(entry['id'], entry['totp_secret'], totp_frame, code_label)
+            except ValueError:
+                code_label.configure(text="2FA Code: invalid secret", text_color="orange")
+            else:
+                def copy_code():
+                    code = self.totp_scheduler.current_code(entry['id'])
+                    if code is None:
+                        return
+                    self.app.clipboard_clear()
+                    self.app.clipboard_append(code)
+                    self.app.update()
+                    status_label.configure(text="Code copied.", text_color="green")
+                    status_label.after(1500, lambda: status_label.configure(text=""))
+
+                copy_code_btn = ctk.CTkButton(totp_frame, text="Copy Code", width=80, command=copy_code)
+                copy_code_btn.pack(side="right", padx=5)
+
         # Frame for action buttons (Edit + Delete)
         actions_frame = ctk.CTkFrame(entry_frame)
         actions_frame.pack(fill="x", padx=10, pady=5)
@@ -305,24 +513,103 @@ class DashboardScreen:
     def refresh_entries(self):
         """
         Refresh the vault entries displayed in the dashboard.
-        Reload from the database and rebuild the scrollable frame.
+        Shows one collapsed header per domain group; entries of a group
+        are only loaded and decrypted when it is expanded.
         """
         # Clear all widgets inside the entries_frame
+        self.totp_scheduler.clear_rows()
         for widget in self.entries_frame.winfo_children():
             widget.destroy()
+        self.entries = {}
+        self.group_containers = {}
 
-        # Reload entries from database
-        from vault import get_all_passwords
-        self.entries = get_all_passwords(self.master_password)
+        self.update_filter_menus()
 
-        # Recreate all entry frames
-        for entry in self.entries:
-            self.create_entry_frame(entry)
+        # Group counts come from a single GROUP BY query
+        groups = get_groups(folder=self.folder_filter, tag=self.tag_filter)
+        for group in groups:
+            self.create_group_header(group)
 
-        if not self.entries:
-            empty_label = ctk.CTkLabel(self.entries_frame, text="No passwords saved yet.")
+        # Forget groups that no longer exist (e.g. last entry deleted)
+        self.expanded_groups &= {group['domain'] for group in groups}
+
+        if not groups:
+            empty_text = "No entries match this filter." if self.folder_filter or self.tag_filter else "No passwords saved yet."
+            empty_label = ctk.CTkLabel(self.entries_frame, text=empty_text)
             empty_label.pack(pady=10)
 
+    def update_filter_menus(self):
+        """
+        Reload the folder and tag choices, dropping filters that no longer match anything.
+        """
+        folders = get_folders()
+        tags = get_tags()
+
+        if self.folder_filter not in folders:
+            self.folder_filter = None
+        if self.tag_filter not in tags:
+            self.tag_filter = None
+
+        self.folder_menu.configure(values=[ALL_FOLDERS] + folders)
+        self.folder_menu.set(self.folder_filter or ALL_FOLDERS)
+        self.tag_menu.configure(values=[ALL_TAGS] + tags)
+        self.tag_menu.set(self.tag_filter or ALL_TAGS)
+
+    def on_folder_filter(self, choice):
+        self.folder_filter = None if choice == ALL_FOLDERS else choice
+        self.refresh_entries()
+
+    def on_tag_filter(self, choice):
+        self.tag_filter = None if choice == ALL_TAGS else choice
+        self.refresh_entries()
+
+    def create_group_header(self, group):
+        """
+        Create the collapsed header for a domain group (a single widget).
+        """
+        domain = group['domain']
+
+        def header_text():
+            arrow = "▾" if domain in self.expanded_groups else "▸"
+            return f"{arrow} {domain} ({group['count']})"
+
+        header = ctk.CTkButton(self.entries_frame, text=header_text(), anchor="w")
+        header.configure(command=lambda: self.toggle_group(domain, header, header_text))
+        header.pack(pady=2, padx=10, fill="x")
+
+        if domain in self.expanded_groups:
+            self.expand_group(domain, header)
+
+    def toggle_group(self, domain, header, header_text):
+        """
+        Expand or collapse a domain group.
+        """
+        if domain in self.expanded_groups:
+            self.expanded_groups.discard(domain)
+            container = self.group_containers.pop(domain, None)
+            if container is not None:
+                for entry_id in [e for e, entry in self.entries.items() if entry['domain'] == domain]:
+                    del self.entries[entry_id]
+                container.destroy()
+        else:
+            self.expanded_groups.add(domain)
+            self.expand_group(domain, header)
+        header.configure(text=header_text())
+
+    def expand_group(self, domain, header):
+        """
+        Load, decrypt and build the rows of one group below its header.
+        """
+        group_entries = get_group_entries(domain, self.master_password, folder=self.folder_filter, tag=self.tag_filter)
+
+        container = ctk.CTkFrame(self.entries_frame, fg_color="transparent")
+        container.pack(after=header, fill="x")
+        self.group_containers[domain] = container
+
+        for entry in group_entries:
+            self.entries[entry['id']] = entry
+            self.create_entry_frame(entry, parent=container)
+
     def delete_password(self, entry_id):
         """
         Delete a password entry by its ID and refresh the vault view.
@@ -1,24 +1,32 @@
 import customtkinter as ctk
 #import os
-from auth import is_master_set, set_master_password, verify_master_password
 from ui.dashboard import DashboardScreen
+from vault_registry import DEFAULT_VAULT, registry
 
 class FirstTimeSetupScreen(ctk.CTk):
     """
     GUI screen for first-time setup to create a master password.
+    With ask_name=True it creates an additional named vault instead.
     """
 
-    def __init__(self, app):
+    def __init__(self, app, ask_name=False):
         self.app = app
+        self.ask_name = ask_name
 
         # Clear any existing widgets from the app windows
         for widget in self.app.winfo_children():
             widget.destroy()
 
         # Title label
-        self.title_label = ctk.CTkLabel(self.app, text="Create Master Password", font=("Arial", 18))
+        title = "Create New Vault" if ask_name else "Create Master Password"
+        self.title_label = ctk.CTkLabel(self.app, text=title, font=("Arial", 18))
         self.title_label.pack(pady=20)
 
+        # Vault name entry (only when adding another vault)
+        if ask_name:
+            self.name_entry = ctk.CTkEntry(self.app, placeholder_text="Vault Name (e.g. work)")
+            self.name_entry.pack(pady=10)
+
         # Master password entry
         self.password_entry = ctk.CTkEntry(self.app, placeholder_text="Master Password", show="*")
         self.password_entry.pack(pady=10)
@@ -35,6 +43,11 @@ class FirstTimeSetupScreen(ctk.CTk):
         self.save_button = ctk.CTkButton(self.app, text="Save Master Password", command=self.save_master_password)
         self.save_button.pack(pady=20)
 
+        # Back to login when adding another vault
+        if ask_name:
+            self.back_button = ctk.CTkButton(self.app, text="Back", command=lambda: LoginScreen(self.app))
+            self.back_button.pack(pady=5)
+
     def save_master_password(self):
         """
         Validate and save the new master password.
@@ -47,17 +60,27 @@ class FirstTimeSetupScreen(ctk.CTk):
         elif len(pw) < 6:
             self.status_label.configure(text="Password too short (min 6 chars).", text_color="orange")
         else:
-            set_master_password(pw)
+            name = self.name_entry.get().strip() if self.ask_name else DEFAULT_VAULT
+            try:
+                registry.create_vault(name, pw)
+            except ValueError as exc:
+                self.status_label.configure(text=str(exc), text_color="red")
+                return
             self.status_label.configure(text="Master Password Set Successfully.", text_color="green")
-            self.app.after(1000, lambda: LoginScreen(self.app))
+            self.app.after(1000, lambda: LoginScreen(self.app, vault_name=name))
 
 class LoginScreen:
     """
     GUI screen for user login using existing master password.
     """
-    def __init__(self, app):
+    def __init__(self, app, vault_name=None):
         self.app = app
 
+        # Only vaults that have a master password can be logged into
+        vault_names = [name for name in registry.list_vaults() if registry.is_master_set(name)]
+        if vault_name not in vault_names:
+            vault_name = vault_names[0] if vault_names else DEFAULT_VAULT
+
         # Clear any existing widgets
         for widget in self.app.winfo_children():
             widget.destroy()
@@ -66,6 +89,11 @@ class LoginScreen:
         self.title_label = ctk.CTkLabel(self.app, text="Enter Master Password", font=("Arial", 18))
         self.title_label.pack(pady=20)
 
+        # Vault selector
+        self.vault_menu = ctk.CTkOptionMenu(self.app, values=vault_names or [DEFAULT_VAULT])
+        self.vault_menu.set(vault_name)
+        self.vault_menu.pack(pady=10)
+
         # Password entry
         self.password_entry = ctk.CTkEntry(self.app, placeholder_text="Master Password", show="*")
         self.password_entry.pack(pady=10)
@@ -78,14 +106,20 @@ class LoginScreen:
         self.login_button = ctk.CTkButton(self.app, text="Login", command=self.attempt_login)
         self.login_button.pack(pady=20)
 
+        # Create another vault
+        self.new_vault_button = ctk.CTkButton(self.app, text="New Vault", command=lambda: FirstTimeSetupScreen(self.app, ask_name=True))
+        self.new_vault_button.pack(pady=5)
+
     def attempt_login(self):
         """
         Verify the entered master password.
         """
         pw = self.password_entry.get()
+        name = self.vault_menu.get()
 
-        if verify_master_password(pw):
+        if registry.unlock(name, pw) is not None:
+            registry.activate(name)
             self.status_label.configure(text="Login Successful.", text_color="green")
-            self.app.after(1000, lambda: DashboardScreen(self.app, pw))
+            self.app.after(1000, lambda: DashboardScreen(self.app, pw, vault_name=name))
         else:
             self.status_label.configure(text="Incorrect password.", text_color="red")
\ No newline at end of file
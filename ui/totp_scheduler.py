@@ -0,0 +1,159 @@
+import time
+from totp import PERIOD, decode_secret, make_hmac_key, time_step, totp_batch, seconds_remaining
+
+class TotpScheduler:
+    """
+    Single refresh timer for every TOTP code shown on the dashboard.
+
+    One after() callback fires at each 30-second boundary and recomputes
+    codes only for rows that are currently on screen. Rows scrolled into
+    view between ticks are filled in from the scroll callback, so nothing
+    runs while the dashboard sits idle.
+    """
+
+    def __init__(self, app, scroll_frame):
+        self.app = app
+        self.scroll_frame = scroll_frame
+
+        # entry id -> (row widget, code label) for rows currently built
+        self._rows = {}
+        # entry id -> time step the label is showing
+        self._shown_steps = {}
+        # entry id -> (secret, keyed HMAC) cached for the whole session
+        self._hmac_keys = {}
+
+        self._after_id = None
+        self._visible_refresh_pending = False
+
+        self._hook_scrolling()
+
+    def _hook_scrolling(self):
+        """
+        Refresh newly visible rows when the scrollable frame moves.
+        """
+        canvas = getattr(self.scroll_frame, "_parent_canvas", None)
+        scrollbar = getattr(self.scroll_frame, "_scrollbar", None)
+        if canvas is None or scrollbar is None:
+            return
+
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            self.schedule_visible_refresh()
+
+        canvas.configure(yscrollcommand=on_scroll)
+
+    def register(self, entry_id, secret, row_widget, code_label):
+        """
+        Track a row showing the code for an entry.
+
+        Raises:
+            ValueError: If the stored secret is not valid base32.
+        """
+        cached = self._hmac_keys.get(entry_id)
+        if cached is None or cached[0] != secret:
+            self._hmac_keys[entry_id] = (secret, make_hmac_key(decode_secret(secret)))
+
+        self._rows[entry_id] = (row_widget, code_label)
+        self._shown_steps.pop(entry_id, None)
+        self.schedule_visible_refresh()
+
+    def clear_rows(self):
+        """
+        Forget all rows (before the dashboard rebuilds them). Keys stay cached.
+        """
+        self._rows.clear()
+        self._shown_steps.clear()
+
+    def start(self):
+        """
+        Start ticking at the next period boundary.
+        """
+        if self._after_id is None:
+            self._schedule_tick()
+
+    def stop(self):
+        """
+        Cancel the timer and drop all cached keys (on logout).
+        """
+        if self._after_id is not None:
+            self.app.after_cancel(self._after_id)
+            self._after_id = None
+        self.clear_rows()
+        self._hmac_keys.clear()
+
+    def _schedule_tick(self):
+        # Small margin so the tick lands just after the boundary, not before it
+        delay_ms = int(seconds_remaining() * 1000) + 50
+        self._after_id = self.app.after(delay_ms, self._tick)
+
+    def _tick(self):
+        self._after_id = None
+        self.refresh_visible()
+        self._schedule_tick()
+
+    def schedule_visible_refresh(self):
+        """
+        Coalesce refresh requests (e.g. many scroll events) into one idle call.
+        """
+        if self._visible_refresh_pending:
+            return
+        self._visible_refresh_pending = True
+        self.app.after_idle(self._run_visible_refresh)
+
+    def _run_visible_refresh(self):
+        self._visible_refresh_pending = False
+        self.refresh_visible()
+
+    def _visible_entry_ids(self):
+        canvas = getattr(self.scroll_frame, "_parent_canvas", None)
+        if canvas is not None and canvas.winfo_exists():
+            view_top = canvas.winfo_rooty()
+            view_bottom = view_top + canvas.winfo_height()
+        else:
+            view_top = view_bottom = None
+
+        visible = []
+        for entry_id, (row_widget, _code_label) in list(self._rows.items()):
+            if not row_widget.winfo_exists():
+                # Row was destroyed (e.g. group collapsed) without clear_rows()
+                del self._rows[entry_id]
+                self._shown_steps.pop(entry_id, None)
+                continue
+            if not row_widget.winfo_ismapped():
+                continue
+            if view_top is not None:
+                row_top = row_widget.winfo_rooty()
+                row_bottom = row_top + row_widget.winfo_height()
+                if row_bottom <= view_top or row_top >= view_bottom:
+                    continue
+            visible.append(entry_id)
+        return visible
+
+    def refresh_visible(self):
+        """
+        Recompute codes for visible rows whose code is out of date.
+        """
+        now = time.time()
+        step = time_step(now, PERIOD)
+
+        stale = {
+            entry_id: self._hmac_keys[entry_id][1]
+            for entry_id in self._visible_entry_ids()
+            if self._shown_steps.get(entry_id) != step
+        }
+        if not stale:
+            return
+
+        for entry_id, code in totp_batch(stale, now).items():
+            _row_widget, code_label = self._rows[entry_id]
+            code_label.configure(text=f"2FA Code: {code[:3]} {code[3:]}")
+            self._shown_steps[entry_id] = step
+
+    def current_code(self, entry_id):
+        """
+        Return the current code for an entry (used by the copy button).
+        """
+        cached = self._hmac_keys.get(entry_id)
+        if cached is None:
+            return None
+        return totp_batch({entry_id: cached[1]})[entry_id]
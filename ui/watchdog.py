@@ -0,0 +1,323 @@
+import json
+import os
+import sys
+import sysconfig
+import threading
+import time
+import traceback
+from collections import Counter
+
+# Project root, used to tell our own frames apart from Tk / library frames
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Library locations that may sit inside the project (e.g. a .venv/ folder);
+# frames from these never count as our own code
+LIBRARY_DIRS = tuple(
+    os.path.abspath(path) + os.sep
+    for path in {sysconfig.get_paths()["purelib"], sysconfig.get_paths()["platlib"], sys.prefix, sys.exec_prefix}
+    # (skip any prefix that contains the project itself, e.g. /usr/local)
+    if path and not (PROJECT_DIR + os.sep).startswith(os.path.abspath(path) + os.sep)
+)
+LIBRARY_DIR_NAMES = {"site-packages", "dist-packages"}
+
+# Histogram bucket upper bounds in milliseconds (last bucket is open-ended)
+BUCKETS_MS = [5, 16, 33, 50, 100, 250, 500, 1000, 2500, 5000]
+
+MAX_SAMPLES_PER_STALL = 20
+MAX_STALLS_KEPT = 200
+
+class EventLoopWatchdog:
+    """
+    Opt-in monitor for stalls of the Tk event loop.
+
+    A heartbeat after() tick on the Tk thread records how late each beat
+    ran. A monitor thread notices when the heartbeat stops and samples the
+    Tk thread's stack, so each stall is attributed to the callback that was
+    running (attempt_login, refresh_entries, save_password, ...).
+    stop() writes a text and a JSON report with stall counts and histograms.
+    """
+
+    def __init__(self, app, interval_ms=100, threshold_ms=250, report_dir=None):
+        self.app = app
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.report_dir = report_dir
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._after_id = None
+        self._tk_thread_id = None
+
+        self._started_at = None
+        self._last_beat = None
+        self._beats = 0
+        self._lag_histogram = [0] * (len(BUCKETS_MS) + 1)
+        self._stall_histogram = [0] * (len(BUCKETS_MS) + 1)
+        self._pending_samples = []
+        self._stalls = []
+        self._stall_count = 0
+        self._by_callback = {}
+
+    # --- Lifecycle ---
+
+    def start(self):
+        """
+        Start the heartbeat and monitor thread. Call from the Tk thread.
+        """
+        self._tk_thread_id = threading.get_ident()
+        self._started_at = time.perf_counter()
+        self._last_beat = self._started_at
+        self._after_id = self.app.after(int(self.interval * 1000), self._heartbeat)
+
+        self._thread = threading.Thread(target=self._monitor, name="EventLoopWatchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop monitoring and write the report. Returns the text report path.
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        if self._after_id is not None:
+            try:
+                self.app.after_cancel(self._after_id)
+            except Exception:
+                pass  # The window may already be destroyed after mainloop()
+            self._after_id = None
+        return self.write_report()
+
+    # --- Tk thread ---
+
+    def _heartbeat(self):
+        now = time.perf_counter()
+        with self._lock:
+            lag = max(0.0, now - self._last_beat - self.interval)
+            self._beats += 1
+            self._lag_histogram[_bucket(lag)] += 1
+            if lag >= self.threshold:
+                self._record_stall(lag)
+            self._pending_samples = []
+            self._last_beat = now
+
+        if not self._stop_event.is_set():
+            self._after_id = self.app.after(int(self.interval * 1000), self._heartbeat)
+
+    def _record_stall(self, duration):
+        # Called with the lock held, once the loop is responsive again
+        samples = self._pending_samples
+        if samples:
+            callback = Counter(sample["callback"] for sample in samples).most_common(1)[0][0]
+            sample = next(s for s in samples if s["callback"] == callback)
+        else:
+            callback = "<unknown>"
+            sample = {"callback": callback, "hotspot": "<unknown>", "stack": []}
+
+        self._stall_count += 1
+        self._stall_histogram[_bucket(duration)] += 1
+
+        stats = self._by_callback.setdefault(callback, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        stats["count"] += 1
+        stats["total_ms"] += duration * 1000
+        stats["max_ms"] = max(stats["max_ms"], duration * 1000)
+
+        self._stalls.append({
+            "duration_ms": round(duration * 1000, 1),
+            "callback": callback,
+            "hotspot": sample["hotspot"],
+            "stack": sample["stack"],
+            "samples": len(samples),
+        })
+        # Keep only the worst stalls so a long session stays bounded
+        if len(self._stalls) > MAX_STALLS_KEPT:
+            self._stalls.sort(key=lambda stall: stall["duration_ms"], reverse=True)
+            del self._stalls[MAX_STALLS_KEPT:]
+
+    # --- Monitor thread ---
+
+    def _monitor(self):
+        poll = self.interval / 2
+        while not self._stop_event.wait(poll):
+            with self._lock:
+                stalled_for = time.perf_counter() - self._last_beat - self.interval
+                if stalled_for < self.threshold or len(self._pending_samples) >= MAX_SAMPLES_PER_STALL:
+                    continue
+            # Sample outside the lock; the Tk thread is blocked anyway
+            sample = self._sample_tk_stack()
+            if sample is not None:
+                with self._lock:
+                    self._pending_samples.append(sample)
+
+    def _sample_tk_stack(self):
+        frame = sys._current_frames().get(self._tk_thread_id)
+        if frame is None:
+            return None
+        stack = traceback.extract_stack(frame)
+
+        # Raw frames, outermost first, limited to our own code
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        own = [f for f in reversed(frames) if _is_project_frame(f.f_code.co_filename)]
+
+        # Outermost named project frame is the Tk callback that is running,
+        # innermost project frame is where the time is being spent
+        # (skipping main.py's module frame that called mainloop())
+        named = [f for f in own if f.f_code.co_name not in ("<lambda>", "<module>")]
+        if named:
+            callback = _frame_label(named[0])
+            # A constructor says little on its own (every screen has one),
+            # so also name what it was running, e.g.
+            # "DashboardScreen.__init__ > DashboardScreen.refresh_entries"
+            if named[0].f_code.co_name == "__init__" and len(named) > 1:
+                callback += f" > {_frame_label(named[1])}"
+        else:
+            callback = "<tk>"
+
+        if own:
+            innermost = own[-1]
+            hotspot = f"{os.path.relpath(innermost.f_code.co_filename, PROJECT_DIR)}:{innermost.f_lineno} {_frame_label(innermost)}"
+        else:
+            hotspot = "<tk>"
+
+        return {
+            "callback": callback,
+            "hotspot": hotspot,
+            "stack": traceback.format_list(stack),
+        }
+
+    # --- Reporting ---
+
+    def summary(self):
+        """
+        Return the collected statistics as a plain dict.
+        """
+        with self._lock:
+            run_time = time.perf_counter() - self._started_at if self._started_at else 0.0
+            stalls = sorted(self._stalls, key=lambda stall: stall["duration_ms"], reverse=True)
+            return {
+                "run_time_s": round(run_time, 1),
+                "interval_ms": self.interval * 1000,
+                "threshold_ms": self.threshold * 1000,
+                "heartbeats": self._beats,
+                "stall_count": self._stall_count,
+                "lag_histogram": _histogram_dict(self._lag_histogram),
+                "stall_histogram": _histogram_dict(self._stall_histogram),
+                "by_callback": {name: dict(stats) for name, stats in self._by_callback.items()},
+                "worst_stalls": stalls,
+            }
+
+    def write_report(self, report_dir=None):
+        """
+        Write watchdog_report.txt and watchdog_report.json. Returns the text path.
+        """
+        report_dir = report_dir or self.report_dir
+        if report_dir is None:
+            from auth import CONFIG_DIR
+            report_dir = CONFIG_DIR
+        os.makedirs(report_dir, exist_ok=True)
+
+        summary = self.summary()
+
+        json_path = os.path.join(report_dir, "watchdog_report.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+        text_path = os.path.join(report_dir, "watchdog_report.txt")
+        with open(text_path, "w", encoding="utf-8") as f:
+            f.write(_format_report(summary))
+        return text_path
+
+def _frame_label(frame):
+    """
+    Qualified name of a frame's function, e.g. "LoginScreen.attempt_login".
+    """
+    code = frame.f_code
+    qualname = getattr(code, "co_qualname", None)  # Python 3.11+
+    if qualname is not None:
+        return qualname
+
+    # Older Pythons: build "relpath:Class.func" from the file and self/cls
+    owner = frame.f_locals.get("self")
+    if owner is not None:
+        owner_name = type(owner).__name__
+    else:
+        owner_cls = frame.f_locals.get("cls")
+        owner_name = owner_cls.__name__ if isinstance(owner_cls, type) else None
+    name = f"{owner_name}.{code.co_name}" if owner_name else code.co_name
+    return f"{os.path.relpath(code.co_filename, PROJECT_DIR)}:{name}"
+
+def _bucket(seconds):
+    ms = seconds * 1000
+    for index, bound in enumerate(BUCKETS_MS):
+        if ms < bound:
+            return index
+    return len(BUCKETS_MS)
+
+def _bucket_label(index):
+    if index < len(BUCKETS_MS):
+        return f"< {BUCKETS_MS[index]} ms"
+    return f">= {BUCKETS_MS[-1]} ms"
+
+def _histogram_dict(counts):
+    return {_bucket_label(index): count for index, count in enumerate(counts)}
+
+def _is_project_frame(filename):
+    # Pseudo-filenames such as "<frozen runpy>" or "<stdin>" would otherwise
+    # resolve against the working directory, which is usually the project
+    if filename.startswith("<"):
+        return False
+    path = os.path.abspath(filename)
+    if not path.startswith(PROJECT_DIR + os.sep):
+        return False
+    if path.endswith(os.path.join("ui", "watchdog.py")):
+        return False
+    # A virtualenv inside the project holds customtkinter etc., not app code
+    if path.startswith(LIBRARY_DIRS) or LIBRARY_DIR_NAMES.intersection(path.split(os.sep)):
+        return False
+    return True
+
+def _format_histogram(histogram):
+    total = sum(histogram.values()) or 1
+    lines = []
+    for label, count in histogram.items():
+        bar = "#" * round(40 * count / total)
+        lines.append(f"  {label:>12} : {count:>7} {bar}")
+    return "\n".join(lines)
+
+def _format_report(summary):
+    lines = [
+        "PassManager event-loop watchdog report",
+        f"Generated: {time.strftime('%Y-%m-%d %H:%M:%S')}",
+        f"Run time: {summary['run_time_s']} s, heartbeats: {summary['heartbeats']}, "
+        f"interval: {summary['interval_ms']:.0f} ms, threshold: {summary['threshold_ms']:.0f} ms",
+        f"Stalls: {summary['stall_count']}",
+        "",
+        "Heartbeat lag:",
+        _format_histogram(summary["lag_histogram"]),
+        "",
+        "Stall duration:",
+        _format_histogram(summary["stall_histogram"]),
+        "",
+        "Stalls by callback:",
+    ]
+
+    by_callback = sorted(summary["by_callback"].items(), key=lambda item: item[1]["total_ms"], reverse=True)
+    if not by_callback:
+        lines.append("  (none)")
+    for name, stats in by_callback:
+        lines.append(
+            f"  {name:<30} count {stats['count']:>5}  total {stats['total_ms']:>9.0f} ms  max {stats['max_ms']:>7.0f} ms"
+        )
+
+    lines += ["", "Worst stalls:"]
+    if not summary["worst_stalls"]:
+        lines.append("  (none)")
+    for stall in summary["worst_stalls"][:5]:
+        lines.append(f"  {stall['duration_ms']:.0f} ms in {stall['callback']} (at {stall['hotspot']})")
+        lines.extend("    " + line for chunk in stall["stack"] for line in chunk.rstrip().splitlines())
+        lines.append("")
+
+    return "\n".join(lines) + "\n"
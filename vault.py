@@ -1,17 +1,83 @@
 import sqlite3
 import os
+import shutil
+import time
+from auth import CONFIG_DIR
 from crypto_utils import encrypt_data
 from crypto_utils import decrypt_data
 
-# Create ~/.config/PassManager/ if it doesn't exist
-CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".config", "PassManager")
-os.makedirs(CONFIG_DIR, exist_ok=True)
+# The vault lives next to the master key in the platform config directory.
+# Older versions kept it in ~/.config/PassManager (see migrate_legacy_vault).
+LEGACY_CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".config", "PassManager")
 
 VAULT_DB = os.path.join(CONFIG_DIR, "vault.db")
+LEGACY_VAULT_DB = os.path.join(LEGACY_CONFIG_DIR, "vault.db")
+
+# Connection of the unlocked vault, set by vault_registry.
+# When None, every call opens and closes its own connection to VAULT_DB.
+_active_conn = None
+
+# Password history retention. Set either limit to None to disable it.
+# - HISTORY_MAX_VERSIONS: how many previous passwords to keep per entry
+# - HISTORY_MAX_AGE_DAYS: drop previous passwords older than this many days
+HISTORY_MAX_VERSIONS = 10
+HISTORY_MAX_AGE_DAYS = 365
+
+# Marks an argument that was not passed, as opposed to an explicit None or ""
+_DEFAULT = object()
+
+# Columns read for an entry, in the order _decrypt_rows() unpacks them
+ENTRY_COLUMNS = 'id, website, username, password, notes, totp_secret, domain, folder'
+
+def migrate_legacy_vault():
+    """
+    Move a vault.db left in the old ~/.config/PassManager folder to VAULT_DB.
+
+    Called once by main.py at startup. Does nothing if there is no legacy
+    file, the new file already exists, or both paths are the same.
+
+    Returns:
+        str: An error message if the move failed, otherwise None.
+    """
+    if os.path.exists(VAULT_DB) or not os.path.exists(LEGACY_VAULT_DB):
+        return None
+    if os.path.abspath(LEGACY_VAULT_DB) == os.path.abspath(VAULT_DB):
+        return None
+    try:
+        shutil.move(LEGACY_VAULT_DB, VAULT_DB)
+    except OSError as exc:
+        # A move across drives copies first; drop a partial copy so the
+        # legacy file stays the only one and the next start retries
+        if os.path.exists(LEGACY_VAULT_DB) and os.path.exists(VAULT_DB):
+            try:
+                os.remove(VAULT_DB)
+            except OSError:
+                pass
+        return f"Could not move your vault from {LEGACY_VAULT_DB} to {VAULT_DB}: {exc}"
+    return None
+
+def use_vault(db_path: str, conn=None):
+    """
+    Point the module at another vault file.
+    If conn is given it is reused by every call instead of reconnecting.
+    """
+    global VAULT_DB, _active_conn
+    VAULT_DB = db_path
+    _active_conn = conn
+
+def _open_connection():
+    if _active_conn is not None:
+        return _active_conn
+    return sqlite3.connect(VAULT_DB)
+
+def _close_connection(conn):
+    # The registry owns the shared connection and closes it on eviction
+    if conn is not _active_conn:
+        conn.close()
 
 def initialize_database():
     # Connect to the SQLite database (creates the file if not exists)
-    conn = sqlite3.connect(VAULT_DB)
+    conn = _open_connection()
     cursor = conn.cursor()
 
     # Creates the passwords table
@@ -24,54 +90,162 @@ def initialize_database():
                    notes TEXT
                )
         ''')
+
+    # Older vaults were created before TOTP support; add the column in place.
+    # The secret is stored encrypted and is NULL for entries without 2FA.
+    cursor.execute('PRAGMA table_info(passwords)')
+    columns = {row[1] for row in cursor.fetchall()}
+    if 'totp_secret' not in columns:
+        cursor.execute('ALTER TABLE passwords ADD COLUMN totp_secret TEXT')
+
+    # Grouping columns: normalized domain of the website and an optional folder
+    if 'domain' not in columns:
+        cursor.execute('ALTER TABLE passwords ADD COLUMN domain TEXT')
+    if 'folder' not in columns:
+        cursor.execute('ALTER TABLE passwords ADD COLUMN folder TEXT')
+
+    # Fill in the domain for entries saved before grouping existed
+    cursor.execute('SELECT id, website FROM passwords WHERE domain IS NULL')
+    cursor.executemany(
+        'UPDATE passwords SET domain = ? WHERE id = ?',
+        [(normalize_domain(website), id_) for id_, website in cursor.fetchall()]
+    )
+
+    # Indexes so group counts and folder filters are answered from the index
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_passwords_domain ON passwords (domain)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_passwords_folder ON passwords (folder, domain)')
+
+    # Tags live in their own table (one row per entry and tag) so that
+    # filtering by a tag is an indexed lookup instead of a text search
+    cursor.execute('''
+                CREATE TABLE IF NOT EXISTS entry_tags (
+                   entry_id INTEGER NOT NULL,
+                   tag TEXT NOT NULL,
+                   PRIMARY KEY (entry_id, tag)
+               )
+        ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_entry_tags_tag ON entry_tags (tag, entry_id)')
+
+    # Creates the password history table. Each row holds a previous
+    # encrypted password for an entry and when it was replaced.
+    cursor.execute('''
+                CREATE TABLE IF NOT EXISTS password_history (
+                   id INTEGER PRIMARY KEY AUTOINCREMENT,
+                   entry_id INTEGER NOT NULL,
+                   password TEXT NOT NULL,
+                   changed_at INTEGER NOT NULL
+               )
+        ''')
+
+    # Index so listing or pruning one entry's history never scans the whole table
+    cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_history_entry
+                ON password_history (entry_id, changed_at)
+        ''')
+
+    # Apply retention once at startup so old rows are pruned in one batch
+    prune_history(cursor=cursor)
     
     # Save (commit) the changes and close the connection
     conn.commit()
-    conn.close()
+    _close_connection(conn)
+
+def normalize_domain(website: str) -> str:
+    """
+    Reduce a website to the domain entries are grouped by.
+
+    "https://www.Example.com:443/login" -> "example.com".
+    Values that are not URLs (e.g. "My Bank") are just lowercased.
+    """
+    value = website.strip().lower()
+    if "://" in value:
+        value = value.split("://", 1)[1]
+    for separator in ("/", "?", "#"):
+        value = value.split(separator, 1)[0]
+    value = value.rsplit("@", 1)[-1].split(":", 1)[0]
+    if value.startswith("www."):
+        value = value[4:]
+    return value or website.strip().lower()
+
+def parse_tags(tags) -> list:
+    """
+    Turn "work, Email" or ["work", "email"] into a sorted list of unique tags.
+    """
+    if not tags:
+        return []
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    return sorted({tag.strip().lower() for tag in tags if tag.strip()})
+
+def _set_tags(cursor, entry_id: int, tags):
+    cursor.execute('DELETE FROM entry_tags WHERE entry_id = ?', (entry_id,))
+    cursor.executemany(
+        'INSERT INTO entry_tags (entry_id, tag) VALUES (?, ?)',
+        [(entry_id, tag) for tag in parse_tags(tags)]
+    )
+
+def _filter_clause(folder: str = None, tag: str = None):
+    # Builds the WHERE clause shared by the grouped queries
+    conditions = []
+    params = []
+    if folder:
+        conditions.append('folder = ?')
+        params.append(folder)
+    if tag:
+        conditions.append('id IN (SELECT entry_id FROM entry_tags WHERE tag = ?)')
+        params.append(tag)
+    where = ('WHERE ' + ' AND '.join(conditions)) if conditions else ''
+    return where, params
 
 def entry_exists(website: str, username: str) -> bool:
-    conn = sqlite3.connect(VAULT_DB)
+    conn = _open_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT 1 FROM passwords WHERE website = ? AND username = ?", (website,username))
     result = cursor.fetchone()
-    conn.close()
+    _close_connection(conn)
     return result is not None
 
-def add_password(website: str, username: str, plain_password: str, notes: str, master_password: str):
-    conn = sqlite3.connect(VAULT_DB)
+def add_password(website: str, username: str, plain_password: str, notes: str, master_password: str, totp_secret: str = "", folder: str = "", tags=None):
+    conn = _open_connection()
     cursor = conn.cursor()
 
-    # Encrypt the password and notes before saving
+    # Encrypt the password, notes and TOTP secret before saving
     encrypted_password = encrypt_data(plain_password, master_password)
     encrypted_notes = encrypt_data(notes, master_password)
+    encrypted_totp = encrypt_data(totp_secret, master_password) if totp_secret else None
 
     # Insert the new record into the database
     cursor.execute('''
-        INSERT INTO passwords (website, username, password, notes)
-        VALUES (?, ?, ?, ?)
-    ''', (website, username, encrypted_password, encrypted_notes))
+        INSERT INTO passwords (website, username, password, notes, totp_secret, domain, folder)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (website, username, encrypted_password, encrypted_notes, encrypted_totp, normalize_domain(website), folder.strip() or None))
+    _set_tags(cursor, cursor.lastrowid, tags)
 
     conn.commit()
-    conn.close()
+    _close_connection(conn)
 
 
-def get_all_passwords(master_password: str) -> list:
-    conn = sqlite3.connect(VAULT_DB)
-    cursor = conn.cursor()
-
-    cursor.execute('SELECT id, website, username, password, notes FROM passwords')
-    rows = cursor.fetchall()
-
-    conn.close()
+def _decrypt_rows(cursor, rows, master_password: str) -> list:
+    # Fetch the tags of all rows in one query
+    # (in chunks, to stay below SQLite's limit on bound parameters)
+    ids = [row[0] for row in rows]
+    tags_by_id = {id_: [] for id_ in ids}
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        placeholders = ', '.join('?' * len(chunk))
+        cursor.execute(f'SELECT entry_id, tag FROM entry_tags WHERE entry_id IN ({placeholders}) ORDER BY tag', chunk)
+        for entry_id, tag in cursor.fetchall():
+            tags_by_id[entry_id].append(tag)
 
     decrypted_entries = []
 
     for row in rows:
-        id_, website, username, encrypted_password, encrypted_notes = row
+        id_, website, username, encrypted_password, encrypted_notes, encrypted_totp, domain, folder = row
 
         # Decrypt sensitive fields
         decrypted_password = decrypt_data(encrypted_password, master_password)
         decrypted_notes = decrypt_data(encrypted_notes, master_password)
+        decrypted_totp = decrypt_data(encrypted_totp, master_password) if encrypted_totp else ""
 
         # Build a clean entry
         entry = {
@@ -79,37 +253,215 @@ def get_all_passwords(master_password: str) -> list:
             "website": website,
             "username": username,
             "password":decrypted_password,
-            "notes": decrypted_notes
+            "notes": decrypted_notes,
+            "totp_secret": decrypted_totp,
+            "domain": domain,
+            "folder": folder or "",
+            "tags": tags_by_id[id_]
         }
 
         decrypted_entries.append(entry)
 
     return decrypted_entries
 
+def get_groups(folder: str = None, tag: str = None) -> list:
+    """
+    Count entries per domain with a single GROUP BY query.
+    Nothing is decrypted, so this stays cheap for large vaults.
+    """
+    conn = _open_connection()
+    cursor = conn.cursor()
+
+    where, params = _filter_clause(folder, tag)
+    cursor.execute(f'''
+        SELECT domain, COUNT(*) FROM passwords
+        {where}
+        GROUP BY domain
+        ORDER BY domain
+    ''', params)
+    rows = cursor.fetchall()
+
+    _close_connection(conn)
+
+    return [{"domain": domain, "count": count} for domain, count in rows]
+
+def get_group_entries(domain: str, master_password: str, folder: str = None, tag: str = None) -> list:
+    """
+    Load and decrypt only the entries of one domain group.
+    """
+    conn = _open_connection()
+    cursor = conn.cursor()
+
+    where, params = _filter_clause(folder, tag)
+    where = f'{where} AND domain = ?' if where else 'WHERE domain = ?'
+    cursor.execute(f'SELECT {ENTRY_COLUMNS} FROM passwords {where} ORDER BY username', (*params, domain))
+    rows = cursor.fetchall()
+    decrypted_entries = _decrypt_rows(cursor, rows, master_password)
+
+    _close_connection(conn)
+
+    return decrypted_entries
+
+def get_folders() -> list:
+    conn = _open_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT DISTINCT folder FROM passwords WHERE folder IS NOT NULL ORDER BY folder')
+    folders = [row[0] for row in cursor.fetchall()]
+    _close_connection(conn)
+    return folders
+
+def get_tags() -> list:
+    conn = _open_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT DISTINCT tag FROM entry_tags ORDER BY tag')
+    tags = [row[0] for row in cursor.fetchall()]
+    _close_connection(conn)
+    return tags
+
 def delete_password(entry_id: int):
-    conn = sqlite3.connect(VAULT_DB)
+    conn = _open_connection()
     cursor = conn.cursor()
 
-    # Delete the record by ID
+    # Delete the record by ID, together with its password history and tags
     cursor.execute('DELETE FROM passwords WHERE id = ?', (entry_id,))
+    cursor.execute('DELETE FROM password_history WHERE entry_id = ?', (entry_id,))
+    cursor.execute('DELETE FROM entry_tags WHERE entry_id = ?', (entry_id,))
 
     conn.commit()
-    conn.close()
+    _close_connection(conn)
 
-def update_password(entry_id: int, new_website: str, new_username: str, new_plain_password: str, new_notes: str, master_password: str):
-    conn = sqlite3.connect(VAULT_DB)
+def update_password(entry_id: int, new_website: str, new_username: str, new_plain_password: str, new_notes: str, master_password: str, new_totp_secret=_DEFAULT, new_folder=_DEFAULT, new_tags=_DEFAULT, old_plain_password: str = None):
+    conn = _open_connection()
     cursor = conn.cursor()
 
-    # Encrypt the new password and notes
-    encrypted_password = encrypt_data(new_plain_password, master_password)
+    cursor.execute('SELECT password FROM passwords WHERE id = ?', (entry_id,))
+    row = cursor.fetchone()
+    old_encrypted_password = row[0] if row else None
+
+    # Only re-encrypt (and record history) when the password actually changed.
+    # Editing just the website, username or notes keeps the old ciphertext.
+    # The caller passes the plaintext it already has so no key is derived
+    # just to compare; without it the password is treated as changed.
+    if old_encrypted_password is not None and old_plain_password == new_plain_password:
+        encrypted_password = old_encrypted_password
+    else:
+        encrypted_password = encrypt_data(new_plain_password, master_password)
+        if old_encrypted_password is not None:
+            # Keep the previous ciphertext so the old password can be recovered
+            cursor.execute('''
+                INSERT INTO password_history (entry_id, password, changed_at)
+                VALUES (?, ?, ?)
+            ''', (entry_id, old_encrypted_password, int(time.time())))
+            prune_history(entry_id, cursor=cursor)
+
     encrypted_notes = encrypt_data(new_notes, master_password)
 
+    # The TOTP secret, folder and tags are only changed when passed;
+    # an empty value clears them
+    assignments = ['website = ?', 'username = ?', 'password = ?', 'notes = ?', 'domain = ?']
+    values = [new_website, new_username, encrypted_password, encrypted_notes, normalize_domain(new_website)]
+    if new_totp_secret is not _DEFAULT:
+        assignments.append('totp_secret = ?')
+        values.append(encrypt_data(new_totp_secret, master_password) if new_totp_secret else None)
+    if new_folder is not _DEFAULT:
+        assignments.append('folder = ?')
+        values.append((new_folder or '').strip() or None)
+
     # Update the record with new values
-    cursor.execute('''
+    cursor.execute(f'''
         UPDATE passwords
-        SET website = ?, username = ?, password = ?, notes = ?
+        SET {', '.join(assignments)}
         WHERE id = ? 
-    ''', (new_website, new_username, encrypted_password, encrypted_notes, entry_id))
+    ''', (*values, entry_id))
+    if new_tags is not _DEFAULT:
+        _set_tags(cursor, entry_id, new_tags)
 
     conn.commit()
-    conn.close()
+    _close_connection(conn)
+
+def get_password_history(entry_id: int) -> list:
+    """
+    List the previous passwords of an entry, newest first.
+
+    Only ids and timestamps are returned; nothing is decrypted here.
+    Use decrypt_history_version() for the version the user picks.
+    """
+    conn = _open_connection()
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        SELECT id, changed_at FROM password_history
+        WHERE entry_id = ?
+        ORDER BY changed_at DESC, id DESC
+    ''', (entry_id,))
+    rows = cursor.fetchall()
+
+    _close_connection(conn)
+
+    return [{"id": id_, "changed_at": changed_at} for id_, changed_at in rows]
+
+def decrypt_history_version(history_id: int, master_password: str):
+    """
+    Decrypt a single previous password by its history id.
+    Returns None if the version no longer exists.
+    """
+    conn = _open_connection()
+    cursor = conn.cursor()
+
+    cursor.execute('SELECT password FROM password_history WHERE id = ?', (history_id,))
+    row = cursor.fetchone()
+
+    _close_connection(conn)
+
+    if row is None:
+        return None
+    return decrypt_data(row[0], master_password)
+
+def prune_history(entry_id: int = None, max_versions=_DEFAULT, max_age_days=_DEFAULT, cursor=None):
+    """
+    Enforce the history retention limits with batched DELETE statements.
+
+    Prunes a single entry when entry_id is given, otherwise the whole table.
+    Limits default to HISTORY_MAX_VERSIONS and HISTORY_MAX_AGE_DAYS;
+    pass None explicitly to skip a limit for this call.
+    When a cursor is passed the caller owns the transaction.
+    """
+    if max_versions is _DEFAULT:
+        max_versions = HISTORY_MAX_VERSIONS
+    if max_age_days is _DEFAULT:
+        max_age_days = HISTORY_MAX_AGE_DAYS
+
+    own_connection = cursor is None
+    if own_connection:
+        conn = _open_connection()
+        cursor = conn.cursor()
+
+    entry_filter = "" if entry_id is None else "AND entry_id = ?"
+    entry_params = () if entry_id is None else (entry_id,)
+
+    # Drop everything older than the maximum age in one statement
+    if max_age_days is not None:
+        cutoff = int(time.time()) - max_age_days * 86400
+        cursor.execute(f'''
+            DELETE FROM password_history
+            WHERE changed_at < ? {entry_filter}
+        ''', (cutoff, *entry_params))
+
+    # Keep only the newest max_versions rows of each entry
+    if max_versions is not None:
+        cursor.execute(f'''
+            DELETE FROM password_history WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, ROW_NUMBER() OVER (
+                        PARTITION BY entry_id ORDER BY changed_at DESC, id DESC
+                    ) AS version
+                    FROM password_history
+                    WHERE 1 = 1 {entry_filter}
+                )
+                WHERE version > ?
+            )
+        ''', (*entry_params, max_versions))
+
+    if own_connection:
+        conn.commit()
+        _close_connection(conn)
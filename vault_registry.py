@@ -0,0 +1,220 @@
+# vault_registry.py
+# -------------------------------------------------------
+# This module keeps track of several independent vaults
+# (e.g. "work" and "personal"), each with its own master password.
+#
+# WHY THIS FILE EXISTS:
+# vault.py and auth.py work on one database and one master key file.
+# The registry decides which files are in use and keeps recently
+# unlocked vaults ready, so switching between them is instant.
+#
+# DESIGN DECISIONS:
+# - The original vault.db / master.key pair is the "default" vault.
+#   Other vaults live in <config dir>/vaults/<name>/.
+# - Listing vaults only looks at directory names; nothing is opened
+#   until a vault is unlocked.
+# - Unlocked vaults are kept in an LRU cache of VaultSession objects
+#   (open SQLite connection + bounded derived-key cache). The least recently used
+#   vault is locked when the cache is full, and vaults that sit unused for
+#   longer than the idle timeout are locked by evict_idle().
+#
+# HOW THIS MODULE FITS THE FULL APPLICATION:
+# - LoginScreen unlocks a vault and activates it.
+# - activate() points vault.py at the session's connection and
+#   crypto_utils at the session's key cache.
+# - DashboardScreen switches vaults without logging in again while the
+#   target vault is still cached.
+# -------------------------------------------------------
+
+import hmac
+import os
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+
+import crypto_utils
+import vault
+from auth import CONFIG_DIR, MASTER_FILE, is_master_set, set_master_password, verify_master_password
+
+# --- Constants ---
+
+DEFAULT_VAULT = "default"
+VAULTS_DIR = os.path.join(CONFIG_DIR, "vaults")
+
+MAX_OPEN_VAULTS = 3       # Unlocked vaults kept in memory at once
+IDLE_TIMEOUT = 15 * 60    # Seconds before an unused, inactive vault is locked
+KEY_CACHE_SIZE = 4096     # Derived keys cached per unlocked vault (LRU, about
+                          # three per entry, each well under 1 KB in memory)
+
+VAULT_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9 _-]{0,31}$")
+
+# --- Sessions ---
+
+class VaultSession:
+    """
+    An unlocked vault: its files, master password, open connection
+    and the keys derived for it so far.
+    """
+
+    def __init__(self, name, db_path, master_password):
+        self.name = name
+        self.db_path = db_path
+        self.master_password = master_password
+        self.conn = sqlite3.connect(db_path)
+        self.key_cache = OrderedDict()
+        self.last_used = time.monotonic()
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    def close(self):
+        self.conn.close()
+        self.key_cache.clear()
+        self.master_password = None
+
+class VaultRegistry:
+    """
+    Opens vaults by name and keeps an LRU-bounded cache of unlocked ones.
+    """
+
+    def __init__(self, max_open=MAX_OPEN_VAULTS, idle_timeout=IDLE_TIMEOUT):
+        self.max_open = max_open
+        self.idle_timeout = idle_timeout
+        self._sessions = OrderedDict()
+        self.active_name = None
+
+    # --- Discovery ---
+
+    def paths(self, name):
+        """
+        Return (db_path, master_file) for a vault name.
+        """
+        if name == DEFAULT_VAULT:
+            return os.path.join(CONFIG_DIR, "vault.db"), MASTER_FILE
+        vault_dir = os.path.join(VAULTS_DIR, name)
+        return os.path.join(vault_dir, "vault.db"), os.path.join(vault_dir, "master.key")
+
+    def list_vaults(self) -> list:
+        """
+        List vault names without opening any of them.
+        """
+        names = [DEFAULT_VAULT]
+        if os.path.isdir(VAULTS_DIR):
+            names += sorted(
+                entry.name for entry in os.scandir(VAULTS_DIR)
+                if entry.is_dir() and entry.name != DEFAULT_VAULT
+            )
+        return names
+
+    def is_master_set(self, name) -> bool:
+        return is_master_set(self.paths(name)[1])
+
+    def create_vault(self, name, password):
+        """
+        Create a new vault directory with its own master password.
+
+        Raises:
+            ValueError: If the name is invalid or already taken.
+        """
+        if not VAULT_NAME_PATTERN.match(name):
+            raise ValueError("Vault name must be 1-32 letters, digits, spaces, '-' or '_'.")
+        if self.is_master_set(name) or (name != DEFAULT_VAULT and name in self.list_vaults()):
+            raise ValueError("A vault with this name already exists.")
+
+        master_file = self.paths(name)[1]
+        os.makedirs(os.path.dirname(master_file), exist_ok=True)
+        set_master_password(password, master_file)
+
+    # --- Unlocking ---
+
+    def get_session(self, name):
+        """
+        Return the cached session of an unlocked vault, or None.
+        """
+        session = self._sessions.get(name)
+        if session is not None:
+            session.touch()
+            self._sessions.move_to_end(name)
+        return session
+
+    def unlock(self, name, password):
+        """
+        Verify the master password and open the vault.
+        Returns the session, or None if the password is wrong.
+        """
+        session = self._sessions.get(name)
+        if session is not None:
+            if not hmac.compare_digest(session.master_password.encode(), password.encode()):
+                return None
+            return self.get_session(name)
+
+        db_path, master_file = self.paths(name)
+        if not verify_master_password(password, master_file):
+            return None
+
+        session = VaultSession(name, db_path, password)
+        self._sessions[name] = session
+
+        # Bring the schema of this vault up to date on its own connection
+        previous = self.active_name
+        self.activate(name)
+        vault.initialize_database()
+        session.conn.commit()
+        if previous is not None and previous in self._sessions:
+            self.activate(previous)
+
+        self._evict_over_limit(keep=name)
+        return session
+
+    def activate(self, name):
+        """
+        Make an unlocked vault the one vault.py and crypto_utils work on.
+        """
+        session = self.get_session(name)
+        if session is None:
+            raise KeyError(f"Vault '{name}' is not unlocked.")
+        vault.use_vault(session.db_path, session.conn)
+        crypto_utils.use_key_cache(session.key_cache, KEY_CACHE_SIZE)
+        self.active_name = name
+        return session
+
+    # --- Eviction ---
+
+    def lock(self, name):
+        """
+        Close a vault and forget its keys.
+        """
+        session = self._sessions.pop(name, None)
+        if session is None:
+            return
+        if name == self.active_name:
+            vault.use_vault(self.paths(DEFAULT_VAULT)[0])
+            crypto_utils.use_key_cache(None)
+            self.active_name = None
+        session.close()
+
+    def lock_all(self):
+        for name in list(self._sessions):
+            self.lock(name)
+
+    def _evict_over_limit(self, keep=None):
+        # Oldest entries come first in the OrderedDict; never evict the active
+        # vault or the one that was just unlocked
+        for name in list(self._sessions):
+            if len(self._sessions) <= self.max_open:
+                break
+            if name not in (self.active_name, keep):
+                self.lock(name)
+
+    def evict_idle(self):
+        """
+        Lock every inactive vault that has not been used for idle_timeout seconds.
+        """
+        now = time.monotonic()
+        for name, session in list(self._sessions.items()):
+            if name != self.active_name and now - session.last_used > self.idle_timeout:
+                self.lock(name)
+
+# Shared registry used by the UI
+registry = VaultRegistry()